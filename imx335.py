@@ -12,20 +12,24 @@ Features:
 - - / = = analogue gain (manual only)
 - r = toggle RAW <-> JPEG capture mode
   - JPEG: captures a processed RGB still and saves as .jpg (via capture_file)
-  - RAW: captures raw Bayer array and metadata, saves as compressed .npz for later processing
+  - RAW: captures raw Bayer array and metadata, saves as .npy + .json sidecar for later processing
 - q = quit
 
 Dependencies:
 - python3-picamera2
 - python3-opencv
 - python3-numpy
+- python3-numba (optional, faster RAW stats; loaded on the first RAW capture)
 
 Install extra lib:
 sudo apt update
 sudo apt install -y python3-numpy
 """
 
+import bisect
+import json
 import os
+import queue
 import time
 import threading
 from datetime import datetime
@@ -33,7 +37,6 @@ from datetime import datetime
 import cv2
 import numpy as np
 from picamera2 import Picamera2
-from libcamera import controls
 import math
 
 # ---- Config ----
@@ -49,17 +52,92 @@ MIN_EXPOSURE_US = 100                  # 1/10,000 s
 MAX_EXPOSURE_US = 85_000               # 1/12 s
 MIN_GAIN = 1.0                         # ~ equivalent to ISO 100
 MAX_GAIN = 9.6                         # ~ equivalent to ISO 6400
+ISO_MIN = 100                          # ISO shown at MIN_GAIN
+ISO_MAX = 6400                         # ISO shown at MAX_GAIN
+
+# Gain -> ISO power-law exponent and camera-style ISO steps (module constants, not rebuilt per frame)
+_ISO_EXPO = math.log(ISO_MAX / ISO_MIN) / math.log(MAX_GAIN / MIN_GAIN)
+_STANDARD_ISOS = (100,110,125,140,160,180,200,220,250,280,320,400,500,640,800,1000,1250,1600,2000,2200,2350,2500,2800,3000,3200,3600,4000,4500,5000,5600,6400)
 
 os.makedirs(SAVE_DIR, exist_ok=True)
 
 
+def _nearest_iso(iso, table):
+    """Return the entry of the sorted table closest to iso (binary search + neighbour compare)."""
+    i = bisect.bisect_left(table, iso)
+    if i == 0:
+        return table[0]
+    if i == len(table):
+        return table[-1]
+    lo, hi = table[i - 1], table[i]
+    return lo if iso - lo <= hi - iso else hi
+
+
+def _build_raw_minmax():
+    """Compile the parallel min/max kernel if Numba is installed, else return a NumPy version."""
+    try:
+        from numba import njit, prange
+    except ImportError:
+        return lambda flat: (flat.min(), flat.max())
+
+    @njit(parallel=True, cache=True)
+    def raw_minmax(flat):
+        mn = flat[0]
+        mx = flat[0]
+        for i in prange(flat.size):
+            v = flat[i]
+            mn = min(mn, v)
+            mx = max(mx, v)
+        return mn, mx
+
+    return raw_minmax
+
+
+_raw_minmax_impl = None
+
+
+def _raw_minmax(flat):
+    """
+    Min and max of a 1-D array in a single pass. Numba is imported on first use (from the
+    RAW writer thread), so preview startup never pays for loading it.
+    """
+    global _raw_minmax_impl
+    if _raw_minmax_impl is None:
+        _raw_minmax_impl = _build_raw_minmax()
+    return _raw_minmax_impl(flat)
+
+
+def _raw_pixels(raw_arr, raw_cfg):
+    """
+    Turn a raw stream buffer into the array that gets saved.
+    Packed CSI-2 formats (e.g. SRGGB10_CSI2P, 4 px in 5 bytes): per-row stride padding cropped off.
+    Unpacked formats (e.g. SRGGB10, SRGGB16): (height, width) uint16 holding 10-bit values,
+    so process_raw_imx335.py can skip unpacking altogether.
+    """
+    if raw_arr.ndim != 2:
+        return raw_arr
+    fmt = str(raw_cfg["format"])
+    width = raw_cfg["size"][0]
+    bits = int("".join(c for c in fmt.split("_")[0] if c.isdigit()))
+    if fmt.endswith("_CSI2P"):
+        return raw_arr[:, :width * bits // 8]
+    pixels = raw_arr.view(np.uint16)[:, :width]
+    if bits > 10:
+        # e.g. SRGGB16 on the Pi 5 is left-aligned; bring it back to the 10-bit range
+        pixels = pixels >> (bits - 10)
+    return pixels
+
+
 class SimpleCameraApp:
     def __init__(self):
         self.picam2 = Picamera2()
 
         # Preview config (processed RGB for on-screen preview)
+        # XRGB8888 is the ISP's native 32-bit output, so no extra packing pass per frame.
+        # It is stored B,G,R,X per pixel: cv2.imshow and the overlay drawing take it as-is
+        # (the X byte is ignored), so frames go to the window without a cvtColor pass.
         self.preview_config = self.picam2.create_preview_configuration(
-            main={"size": DISPLAY_SIZE, "format": "RGB888"}
+            main={"size": DISPLAY_SIZE, "format": "XRGB8888"}
         )
 
         # Still configs:
@@ -68,14 +146,17 @@ class SimpleCameraApp:
             main={"size": STILL_SIZE, "format": "RGB888"}
         )
         
-        # This guarantees we use the exact format string (e.g. 'SRGGB12_CSI2P') the driver expects.
+        # This guarantees we use the exact format string (e.g. 'SRGGB10') the driver expects.
+        # The unpacked variant has the CSI-2 receiver/ISP hardware expand pixels to 16 bits,
+        # so no bit unpacking is needed in software later.
         try:
             raw_mode = next(m for m in self.picam2.sensor_modes if m['size'] == STILL_SIZE)
-            self.still_config_raw = self.picam2.create_still_configuration(raw=raw_mode)
+            raw_format = raw_mode.get("unpacked", raw_mode["format"])
+            self.still_config_raw = self.picam2.create_still_configuration(raw={"size": raw_mode["size"], "format": raw_format})
         except StopIteration:
             print(f"Warning: Resolution {STILL_SIZE} not found in sensor modes. Using defaults.")
             # Fallback if specific resolution isn't found
-            self.still_config_raw = self.picam2.create_still_configuration(raw={"size": STILL_SIZE, "format": "SRGGB12_CSI2P"})
+            self.still_config_raw = self.picam2.create_still_configuration(raw={"size": STILL_SIZE, "format": "SRGGB12"})
 
         # Start preview config by default
         self.picam2.configure(self.preview_config)
@@ -91,29 +172,76 @@ class SimpleCameraApp:
         self.flash_text = ""
         self.lock = threading.Lock()
         self.raw_mode = False  # False = JPEG, True = RAW
+        self._white = None     # cached flash overlay, sized to the preview frame
+        self._overlay_tiles = {}  # block name -> (key, tile), see _draw_overlay
+
+        # RAW files are written by a background thread so captures don't wait on disk
+        self._io_q = queue.Queue()
+        self._io_thr = threading.Thread(target=self._io_worker, daemon=True)
+        self._io_thr.start()
 
         # Start preview
         self.picam2.start()
-        time.sleep(0.15)
+        self._wait_settle()
         self.picam2.set_controls({"AeEnable": True})
 
-        # Optional GPIO placeholder
-        self.gpio = None
-        try:
-            import gpiozero  # noqa: F401
-            self.gpio = True
-        except Exception:
-            self.gpio = False
+        # Optional GPIO placeholder (gpiozero gets imported where buttons are actually wired up)
+        self.gpio = False
 
     def run(self):
         window_name = "IMX335 Camera"
-        cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
+        # Let the GPU do the blit where OpenCV was built with OpenGL; plain window otherwise
+        try:
+            cv2.namedWindow(window_name, cv2.WINDOW_NORMAL | cv2.WINDOW_OPENGL)
+        except cv2.error:
+            cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
         cv2.resizeWindow(window_name, *DISPLAY_SIZE)
 
+        # Capture + overlay run on their own thread; this (GUI) thread only shows
+        # the newest finished frame and pumps keys, so a slow imshow/waitKey
+        # never holds up the camera.
+        frames = queue.Queue(maxsize=1)
+        producer = threading.Thread(target=self._capture_loop, args=(frames,), daemon=True)
+        producer.start()
+
+        exposure_us, analogue_gain = 0, 1.0
         try:
             while self.running:
-                frame = self.picam2.capture_array()
-                metadata = self.picam2.capture_metadata()
+                try:
+                    frame, exposure_us, analogue_gain = frames.get(timeout=0.1)
+                    cv2.imshow(window_name, frame)
+                except queue.Empty:
+                    pass
+
+                # Non-blocking: the frame queue already paces this loop
+                key = cv2.pollKey()
+                if key != -1:
+                    self._handle_keypress(key & 0xFF, exposure_us, analogue_gain)
+
+        finally:
+            self.running = False
+            producer.join()
+            # Let queued RAW writes finish before exiting
+            self._io_q.put(None)
+            self._io_thr.join()
+            self.picam2.stop()
+            cv2.destroyAllWindows()
+
+    def _capture_loop(self, frames):
+        """
+        Producer side of the preview: capture, annotate and hand frames to run().
+        Only the newest frame is kept; a frame the GUI has not picked up yet is dropped.
+        """
+        last_exposure_us, shutter_str = None, ""
+        try:
+            while self.running:
+                # Take frame + metadata from the same request (one round-trip per frame)
+                request = self.picam2.capture_request()
+                try:
+                    frame = request.make_array("main")
+                    metadata = request.get_metadata()
+                finally:
+                    request.release()
 
                 exposure_us = metadata.get("ExposureTime", 0)
                 # For reasons unknown to anybody but god, the picamera2 API has 2 different gains:
@@ -130,24 +258,17 @@ class SimpleCameraApp:
                 iso_est_raw = float(display_gain) * 100.0
                 
                 # --- map sensor gain -> ISO (power law) ---
-                GAIN_MIN = 1.0
-                GAIN_MAX = 9.6   # now use 9.6 as top end
-                ISO_MIN = 100
-                ISO_MAX = 6400
-                
-                expo = 1.0
-                if GAIN_MAX > GAIN_MIN and ISO_MAX > ISO_MIN:
-                    expo = math.log(ISO_MAX / ISO_MIN) / math.log(GAIN_MAX / GAIN_MIN)
-
-                iso_float = ISO_MIN * ((display_gain / GAIN_MIN) ** expo)
+                iso_float = ISO_MIN * ((display_gain / MIN_GAIN) ** _ISO_EXPO)
 
                 # --- rounding to camera-style ISO (nearest standard ISO) ---
-                STANDARD_ISOS = [100,110,125,140,160,180,200,220,250,280,320,400,500,640,800,1000,1250,1600,2000,2200,2350,2500,2800,3000,3200,3600,4000,4500,5000,5600,6400]
-                iso_est = min(STANDARD_ISOS, key=lambda s: abs(s - iso_float))
+                iso_est = _nearest_iso(iso_float, _STANDARD_ISOS)
                 # iso_est now is e.g. 100, 200, 400, 800, 1600, 3200, 6400 etc.
 
 
-                shutter_str = self._format_shutter(exposure_us)
+                # Exposure only moves every few frames under AE; reformat only when it does
+                if exposure_us != last_exposure_us:
+                    shutter_str = self._format_shutter(exposure_us)
+                    last_exposure_us = exposure_us
 
                 # Draw overlays
                 self._draw_overlay(frame, shutter_str, analogue_gain, total_gain, iso_est)
@@ -156,23 +277,26 @@ class SimpleCameraApp:
                 now = time.time()
                 with self.lock:
                     if now < self.flash_until:
-                        overlay = frame.copy()
-                        cv2.rectangle(overlay, (0, 0), (frame.shape[1], frame.shape[0]), (255, 255, 255), -1)
+                        # Blend in place against a cached white frame (no per-frame copy/fill)
+                        if self._white is None or self._white.shape != frame.shape:
+                            self._white = np.full(frame.shape, 255, dtype=frame.dtype)
                         alpha = 0.25
-                        cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0, frame)
+                        cv2.addWeighted(self._white, alpha, frame, 1 - alpha, 0, frame)
                         if self.flash_text:
                             cv2.putText(frame, self.flash_text, (20, 60), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 3,
                                         cv2.LINE_AA)
 
-                cv2.imshow(window_name, frame)
-
-                key = cv2.waitKey(1) & 0xFF
-                if key != 0xFF:
-                    self._handle_keypress(key, exposure_us, analogue_gain)
-
+                item = (frame, exposure_us, analogue_gain)
+                try:
+                    frames.put_nowait(item)
+                except queue.Full:
+                    try:
+                        frames.get_nowait()
+                    except queue.Empty:
+                        pass
+                    frames.put_nowait(item)
         finally:
-            self.picam2.stop()
-            cv2.destroyAllWindows()
+            self.running = False
 
     # ---------- Overlay / UI helpers ----------
     def _format_shutter(self, exposure_us: int) -> str:
@@ -191,22 +315,49 @@ class SimpleCameraApp:
                 return f"{int(exposure_s)}s"
 
     def _draw_overlay(self, frame, shutter_str: str, a_gain, d_gain, iso_est):
-        h, w, _ = frame.shape
-        font = cv2.FONT_HERSHEY_SIMPLEX
+        # Each text block is cached as a rasterised tile and blended onto each frame. Blocks are
+        # keyed separately (AE moving the gain only touches the lines that show it), and a block
+        # whose text just changed is drawn directly: it is only rasterised once it holds still
+        # for a second frame, so text that changes every frame costs no more than putText.
+        for name, texts in self._overlay_texts(frame.shape[0], shutter_str, a_gain, d_gain, iso_est):
+            key = (frame.shape, texts)
+            cached = self._overlay_tiles.get(name)
+            if cached is None or cached[0] != key:
+                self._overlay_tiles[name] = (key, None)
+                for text, org, scale, color, thickness in texts:
+                    cv2.putText(frame, text, org, cv2.FONT_HERSHEY_SIMPLEX, scale, color, thickness, cv2.LINE_AA)
+                continue
+            if cached[1] is None:
+                cached = (key, self._render_tile(frame.shape, texts))
+                self._overlay_tiles[name] = cached
+                if cached[1] is None:
+                    continue
+
+            # Premultiplied alpha blend, in place in uint8: roi = roi * inv_alpha / 255 + sprite
+            y, x, sprite, inv_alpha = cached[1]
+            roi = frame[y:y + sprite.shape[0], x:x + sprite.shape[1]]
+            cv2.multiply(roi, inv_alpha, dst=roi, scale=1 / 255)
+            cv2.add(roi, sprite, dst=roi)
+
+    def _overlay_texts(self, h, shutter_str: str, a_gain, d_gain, iso_est):
+        """
+        The overlay as (name, texts) blocks, where texts is a tuple of
+        (text, org, scale, color, thickness) entries drawn in order.
+        """
         fs = 0.7
         th = 2
         margin = 12
-        
+
         #r_gain = round((self.manual_gain),2)
 
         mode_text = "RAW" if self.raw_mode else "JPEG"
         ae_text = "AE: ON" if self.ae_enabled else f"AE: OFF"
         info_text = f"{ae_text}  {shutter_str}   ISO {iso_est}   MODE: {mode_text}"
-        cv2.putText(frame, info_text, (margin + 2, h - margin + 2), font, fs, (0, 0, 0), th + 2, cv2.LINE_AA)
-        cv2.putText(frame, info_text, (margin, h - margin), font, fs, (255, 255, 255), th, cv2.LINE_AA)
+        blocks = [("info", ((info_text, (margin + 2, h - margin + 2), fs, (0, 0, 0), th + 2),
+                            (info_text, (margin, h - margin), fs, (255, 255, 255), th)))]
 
-        ae_text = f"AE: ON  E={shutter_str or 'â'} AG={a_gain or 'â'} TG={d_gain or 'â'}" if self.ae_enabled else f"AE: OFF  E={self.manual_exposure_us or 'â'} AG={self.manual_gain or 'â'} TG={d_gain or 'â'}"
-        cv2.putText(frame, ae_text, (margin, 26), font, 0.6, (255, 255, 255), 1, cv2.LINE_AA)
+        ae_text = f"AE: ON  E={shutter_str or 'â'} AG={a_gain or 'â'} TG={d_gain or 'â'}" if self.ae_enabled else f"AE: OFF  E={self.manual_exposure_us or 'â'} AG={self.manual_gain or 'â'} TG={d_gain or 'â'}"
+        blocks.append(("ae", ((ae_text, (margin, 26), 0.6, (255, 255, 255), 1),)))
 
         if self.show_help:
             lines = [
@@ -218,9 +369,50 @@ class SimpleCameraApp:
                 "q = QUIT"
             ]
             hy = 52
+            help_texts = []
             for line in lines:
-                cv2.putText(frame, line, (margin, hy), font, 0.5, (255, 255, 255), 1, cv2.LINE_AA)
+                help_texts.append((line, (margin, hy), 0.5, (255, 255, 255), 1))
                 hy += 18
+            blocks.append(("help", tuple(help_texts)))
+        return blocks
+
+    def _render_tile(self, shape, texts):
+        """
+        Rasterise one block of texts into a buffer the size of their cv2.getTextSize boxes and
+        return it as a (y, x, sprite, inv_alpha) uint8 tile, or None if it is off-frame.
+        sprite is premultiplied colour and inv_alpha is 255 - anti-aliased coverage, in every channel.
+        """
+        h, w, channels = shape
+        font = cv2.FONT_HERSHEY_SIMPLEX
+
+        boxes = []
+        for text, org, scale, color, thickness in texts:
+            (tw, tht), baseline = cv2.getTextSize(text, font, scale, thickness)
+            pad = thickness + 1
+            boxes.append((org[0] - pad, org[1] - tht - pad, org[0] + tw + pad, org[1] + baseline + pad))
+        x0 = max(min(b[0] for b in boxes), 0)
+        y0 = max(min(b[1] for b in boxes), 0)
+        x1 = min(max(b[2] for b in boxes), w)
+        y1 = min(max(b[3] for b in boxes), h)
+        if x1 <= x0 or y1 <= y0:
+            return None
+
+        colour = np.zeros((y1 - y0, x1 - x0, channels), dtype=np.float32)
+        alpha = np.zeros((y1 - y0, x1 - x0, 1), dtype=np.float32)
+        layer = np.empty((y1 - y0, x1 - x0), dtype=np.uint8)
+        for text, org, scale, color, thickness in texts:
+            # Coverage of this text alone, then composite it over what is already drawn
+            layer.fill(0)
+            cv2.putText(layer, text, (org[0] - x0, org[1] - y0), font, scale, 255, thickness, cv2.LINE_AA)
+            a = layer[..., None] / np.float32(255)
+            col = np.zeros(channels, dtype=np.float32)
+            col[:len(color)] = color
+            colour = colour * (1 - a) + col * a
+            alpha = alpha * (1 - a) + a
+
+        sprite = (colour + 0.5).astype(np.uint8)
+        inv_alpha = ((1 - alpha) * 255 + 0.5).astype(np.uint8)
+        return y0, x0, sprite, np.repeat(inv_alpha, channels, axis=2)
 
     # ---------- Controls / Capture ----------
     def _handle_keypress(self, key, cur_exposure_us, cur_gain):
@@ -278,24 +470,33 @@ class SimpleCameraApp:
             self.manual_gain = float(cur_gain or 1.0)
             self._apply_manual_controls()
 
-    def _apply_manual_controls(self):
+    def _wait_settle(self, frames=3):
+        """Block until the pipeline has delivered a few frames instead of sleeping a fixed time."""
+        for _ in range(frames):
+            self.picam2.capture_metadata()
+
+    def _manual_controls(self):
         ctrl = {"AeEnable": False}
         if self.manual_exposure_us:
             ctrl["ExposureTime"] = int(self.manual_exposure_us)
         if self.manual_gain:
             ctrl["AnalogueGain"] = float(self.manual_gain)
-        self.picam2.set_controls(ctrl)
+        return ctrl
+
+    def _apply_manual_controls(self):
+        self.picam2.set_controls(self._manual_controls())
 
     def _capture_still(self):
         """
         Capture a still in either JPEG or RAW mode.
-        JPEG: reconfigure to processed still config and use capture_file(filename.jpg)
-        RAW: reconfigure to RAW still config, capture_array() to retrieve Bayer data,
-             save compressed .npz with raw + metadata for later processing
+        JPEG: switch_mode_and_capture_file(filename.jpg) with the processed still config
+        RAW: switch_mode_and_capture_request() with the RAW still config to retrieve Bayer data,
+             save .npy (raw) + .json (metadata) for later processing
+        picamera2 switches back to the preview config itself once the frame is taken.
         """
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         if self.raw_mode:
-            filename = os.path.join(SAVE_DIR, f"imx335_{timestamp}.npz")
+            filename = os.path.join(SAVE_DIR, f"imx335_{timestamp}.npy")
         else:
             filename = os.path.join(SAVE_DIR, f"imx335_{timestamp}.jpg")
 
@@ -305,72 +506,82 @@ class SimpleCameraApp:
             self.flash_until = time.time() + FLASH_MS
 
         try:
-            # Stop preview and switch to selected still config
-            self.picam2.stop()
             if self.raw_mode:
                 cfg = self.still_config_raw
             else:
                 cfg = self.still_config_jpeg
 
-            self.picam2.configure(cfg)
-            self.picam2.start()
-            time.sleep(0.20)  # settle
-
-            # If AE disabled, apply manual controls to still capture
+            # If AE disabled, start the still mode with the manual controls already applied
             if not self.ae_enabled:
-                ctrl = {}
-                if self.manual_exposure_us:
-                    ctrl["ExposureTime"] = int(self.manual_exposure_us)
-                if self.manual_gain:
-                    ctrl["AnalogueGain"] = float(self.manual_gain)
-                ctrl["AeEnable"] = False
-                self.picam2.set_controls(ctrl)
+                cfg = dict(cfg, controls={**cfg.get("controls", {}), **self._manual_controls()})
 
             # Capture depending on mode
             if self.raw_mode:
-                raw_arr = self.picam2.capture_array("raw")
-                meta = self.picam2.capture_metadata()
-                # Compute small diagnostics to help later debugging
+                request = self.picam2.switch_mode_and_capture_request(cfg)
                 try:
-                    raw_stats = {
-                        "dtype": str(raw_arr.dtype),
-                        "shape": raw_arr.shape,
-                        "min": int(raw_arr.min()),
-                        "max": int(raw_arr.max())
-                    }
-                except Exception:
-                    raw_stats = {"info": "could not compute stats"}
-
-                # Save raw + metadata + stats (compressed)
-                np.savez_compressed(filename, raw=raw_arr, metadata=str(meta), raw_stats=str(raw_stats))
+                    raw_arr = request.make_array("raw")
+                    meta = request.get_metadata()
+                finally:
+                    request.release()
+                raw_arr = _raw_pixels(raw_arr, cfg["raw"])
+                # Own copy of the pixels: the writer thread outlives this capture
+                raw_arr = np.ascontiguousarray(raw_arr)
 
+                # Stats + disk write happen on the I/O thread, preview resumes right away
+                self._io_q.put((filename, raw_arr, meta))
 
             else:
                 # JPEG mode: let libcamera encode to JPEG
-                self.picam2.capture_file(filename)
+                self.picam2.switch_mode_and_capture_file(cfg, filename)
 
-            # saved flash
-            with self.lock:
-                self.flash_text = f"SAVED: {os.path.basename(filename)}"
-                self.flash_until = time.time() + 1.2
+                # saved flash
+                with self.lock:
+                    self.flash_text = f"SAVED: {os.path.basename(filename)}"
+                    self.flash_until = time.time() + 1.2
 
         except Exception as e:
             with self.lock:
                 self.flash_text = f"ERROR: {e}"
                 self.flash_until = time.time() + 1.5
 
-        finally:
-            # Restore preview config
+    def _io_worker(self):
+        """
+        Background writer for RAW captures. Takes (filename, raw_arr, metadata) jobs
+        off self._io_q until it gets None.
+        """
+        while True:
+            job = self._io_q.get()
+            if job is None:
+                return
+            filename, raw_arr, meta = job
             try:
-                self.picam2.stop()
-                self.picam2.configure(self.preview_config)
-                self.picam2.start()
-            except Exception:
-                pass
+                # Compute small diagnostics to help later debugging
+                try:
+                    raw_min, raw_max = _raw_minmax(raw_arr.ravel())
+                    raw_stats = {
+                        "dtype": str(raw_arr.dtype),
+                        "shape": raw_arr.shape,
+                        "min": int(raw_min),
+                        "max": int(raw_max)
+                    }
+                except Exception:
+                    raw_stats = {"info": "could not compute stats"}
 
-            time.sleep(1.2)
-            with self.lock:
-                self.flash_text = ""
+                # Save raw as plain .npy (memcpy-speed write, memory-mappable when processing)
+                # with metadata + stats in a small JSON sidecar next to it.
+                np.save(filename, raw_arr)
+                with open(os.path.splitext(filename)[0] + ".json", "w") as f:
+                    json.dump({"metadata": meta, "raw_stats": raw_stats}, f, indent=2, default=str)
+
+                # saved flash
+                with self.lock:
+                    self.flash_text = f"SAVED: {os.path.basename(filename)}"
+                    self.flash_until = time.time() + 1.2
+
+            except Exception as e:
+                with self.lock:
+                    self.flash_text = f"ERROR: {e}"
+                    self.flash_until = time.time() + 1.5
 
 def main():
     app = SimpleCameraApp()
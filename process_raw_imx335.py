@@ -3,126 +3,285 @@ import numpy as np
 import cv2
 import os
 import glob
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from numba import njit, prange, set_num_threads
+except ImportError:
+    njit = None
 
 # ---- CONFIGURATION ----
 INPUT_DIR = "/home/user/Pictures"
 OUTPUT_DIR = "/home/user/Pictures/Processed"
-# IMX335 is usually RGGB. If colors are wrong, try cv2.COLOR_BayerBG2RGB
-BAYER_PATTERN = cv2.COLOR_BayerRG2RGB 
+# IMX335 is usually RGGB. If colors are wrong, try cv2.COLOR_BayerBG2RGB_EA
+# The _EA (edge-aware) variant costs about the same as plain bilinear but keeps edges cleaner;
+# drop the suffix for the old bilinear output. (VNG is 8-bit only, so not usable here.)
+BAYER_PATTERN = cv2.COLOR_BayerRG2RGB_EA
 ENABLE_GAMMA = True
+GAMMA = 2.2
+
+# IMX335 Resolution
+SENSOR_WIDTH, SENSOR_HEIGHT = 2592, 1944
+
+# 10-bit input has only 1024 levels per channel: precompute gamma (1/GAMMA) scaled to 16-bit once
+GAMMA_LUT = (np.clip(np.power(np.arange(1024, dtype=np.float32) / 1023.0, 1/GAMMA), 0, 1) * 65535).astype(np.uint16)
+# Rows per band for the NumPy gamma lookup (128 x 2592 x 3 x 2 B ~ 2 MB per band)
+GAMMA_TILE_ROWS = 128
+
+# RAW10 LSB byte -> its four 2-bit fields, one per pixel lane (a table-driven bit deposit).
+# Row v is [v & 3, (v >> 2) & 3, (v >> 4) & 3, (v >> 6) & 3]; as uint64 that is one 64-bit word per block.
+_LSB_SPREAD = ((np.arange(256, dtype=np.uint16)[:, None] >> np.arange(0, 8, 2, dtype=np.uint16)) & 0x03).astype(np.uint16)
+_LSB_SPREAD64 = _LSB_SPREAD.view(np.uint64).ravel()
 
-def unpack_raw10(packed_array, width, height):
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _unpack_raw10_rows(rows, out64, spread64):
+        """
+        Numba kernel: unpack cropped RAW10 rows (height x width*5/4 bytes) straight into
+        out64 (the height x width uint16 output viewed as uint64, one word per 4 pixels) in
+        one pass, rows spread across cores. The four MSB bytes are placed in their 16-bit
+        lanes and shifted together, then the LSBs land with one table word: one 64-bit
+        store per block. Lane order assumes a little-endian host (as on the Pi).
+        """
+        height, n_words = out64.shape
+        for y in prange(height):
+            src = rows[y]
+            dst = out64[y]
+            for b in range(n_words):
+                o = 5 * b
+                msb = (np.uint64(src[o]) | (np.uint64(src[o + 1]) << np.uint64(16))
+                       | (np.uint64(src[o + 2]) << np.uint64(32)) | (np.uint64(src[o + 3]) << np.uint64(48)))
+                dst[b] = (msb << np.uint64(2)) | spread64[src[o + 4]]
+
+    @njit(parallel=True, cache=True)
+    def _apply_lut(flat, lut, out):
+        """
+        Numba kernel: out[i] = lut[flat[i]] over flat 1-D views, split across cores.
+        Indices past the table clamp to its last entry (no bounds checks in compiled code).
+        """
+        last = lut.size - 1
+        for i in prange(flat.size):
+            out[i] = lut[min(flat[i], last)]
+
+class Raw10Unpacker:
     """
-    Unpacks 10-bit packed CSI-2 data (SRGGB10) from Raspberry Pi.
+    Unpacks 10-bit packed CSI-2 data (SRGGB10) from Raspberry Pi, for one fixed resolution.
     
     Structure (5 bytes -> 4 pixels):
     [P0_MSB][P1_MSB][P2_MSB][P3_MSB][LSBs]
     LSBs byte: [P3:2][P2:2][P1:2][P0:2]
+
+    All shape arithmetic and the work buffers are set up once here; unpack() returns the same
+    output buffer every call, so use (or copy) the result before unpacking the next frame.
     """
-    raw_bytes = packed_array.flatten().astype(np.uint8)
-    
-    # 1. Determine Stride (Bytes per row)
-    file_size = raw_bytes.size
-    stride = file_size // height
-    
-    print(f"   -> Debug: Size={file_size}, Stride={stride} bytes/row")
-    
-    # 2. Reshape into rows and remove padding
-    # 10-bit packed width = width * 1.25 bytes
-    valid_packed_width = int(width * 1.25) 
-    
-    try:
-        # Reshape to (Height, Stride)
-        raw_rows = raw_bytes.reshape((height, stride))
-        # Crop off the padding bytes at the end of each row
-        raw_rows = raw_rows[:, :valid_packed_width]
-    except ValueError:
-        print(f"   -> Error: shape mismatch. Expected {height}x{stride}, got {raw_bytes.shape}")
-        return None
-
-    # 3. Reshape for unpacking (N blocks of 5 bytes)
-    # We flatten again, then reshape into chunks of 5 bytes
-    flat_packed = raw_rows.flatten()
-    n_pixels = width * height
-    n_blocks = n_pixels // 4
-    
-    blocks = flat_packed.reshape((n_blocks, 5))
-    
-    # 4. Extract Components
-    # MSBs are simply the first 4 bytes
-    p0_msb = blocks[:, 0].astype(np.uint16)
-    p1_msb = blocks[:, 1].astype(np.uint16)
-    p2_msb = blocks[:, 2].astype(np.uint16)
-    p3_msb = blocks[:, 3].astype(np.uint16)
-    
-    # LSBs are in the 5th byte (index 4)
-    lsb_byte = blocks[:, 4].astype(np.uint16)
-    
-    # 5. Shift and Combine
-    # P0 gets bits 0-1 of LSB byte
-    p0 = (p0_msb << 2) | (lsb_byte & 0x03)
-    # P1 gets bits 2-3
-    p1 = (p1_msb << 2) | ((lsb_byte >> 2) & 0x03)
-    # P2 gets bits 4-5
-    p2 = (p2_msb << 2) | ((lsb_byte >> 4) & 0x03)
-    # P3 gets bits 6-7
-    p3 = (p3_msb << 2) | ((lsb_byte >> 6) & 0x03)
-    
-    # 6. Interleave to final image
-    unpacked = np.zeros((n_pixels,), dtype=np.uint16)
-    unpacked[0::4] = p0
-    unpacked[1::4] = p1
-    unpacked[2::4] = p2
-    unpacked[3::4] = p3
-    
-    return unpacked.reshape((height, width))
 
-def process_file(filepath):
-    print(f"Processing: {os.path.basename(filepath)}...")
-    
-    try:
-        data = np.load(filepath)
-        raw_packed = data['raw']
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        # 10-bit packed width = width * 1.25 bytes
+        self.valid_packed_width = width * 5 // 4
+        self.n_blocks = (width * height) // 4
+        self.out = np.empty((height, width), dtype=np.uint16)
+        if njit is None:
+            # NumPy fallback work buffers: the 5 byte planes and the spread LSBs
+            self._planes = np.empty((5, self.n_blocks), dtype=np.uint8)
+            self._lsb_spread = np.empty(self.n_blocks, dtype=np.uint64)
+
+    def unpack(self, packed_array):
+        """Unpack one frame into self.out and return it, or None if the size doesn't fit."""
+        height, width = self.height, self.width
+        # ravel() is a view for contiguous input, so memory-mapped .npy data isn't copied here
+        raw_bytes = np.ravel(packed_array).astype(np.uint8, copy=False)
+        
+        # 1. Determine Stride (Bytes per row)
+        file_size = raw_bytes.size
+        stride = file_size // height
         
-        # IMX335 Resolution
-        W, H = 2592, 1944
+        print(f"   -> Debug: Size={file_size}, Stride={stride} bytes/row")
         
-        # Attempt unpack
-        raw_16bit = unpack_raw10(raw_packed, W, H)
+        # 2. Reshape into rows and remove padding
+        if stride < self.valid_packed_width or stride * height != file_size:
+            print(f"   -> Error: shape mismatch. Expected {height}x{stride}, got {raw_bytes.shape}")
+            return None
+        # Crop off the padding bytes at the end of each row
+        raw_rows = raw_bytes.reshape((height, stride))[:, :self.valid_packed_width]
+
+        # Fast path: fused, parallel unpack when Numba is installed
+        if njit is not None:
+            _unpack_raw10_rows(raw_rows, self.out.view(np.uint64), _LSB_SPREAD64)
+            return self.out
+
+        # 3. Split into 5 contiguous byte planes (AoS -> SoA): plane k holds byte k of every
+        # 5-byte block. This one copy replaces the old flatten, and every op below then
+        # streams through contiguous memory instead of stride-5 columns.
+        planes = self._planes
+        np.copyto(planes.reshape((5, height, width // 4)), raw_rows.reshape((height, width // 4, 5)).transpose(2, 0, 1))
+
+        # 4. Output buffer, viewed as one row of 4 pixels per 5-byte block
+        dst = self.out.reshape((self.n_blocks, 4))
+
+        # LSBs are in the 5th byte (index 4): one table lookup spreads all four 2-bit fields
+        np.take(_LSB_SPREAD64, planes[4], out=self._lsb_spread)
+        lsb_spread = self._lsb_spread.view(np.uint16).reshape((self.n_blocks, 4))
+
+        # 5. Shift and Combine, written straight into the output (no per-pixel temporaries)
+        # Pixel i: MSB byte i << 2, plus bits 2i..2i+1 of the LSB byte
+        for i in range(4):
+            np.left_shift(planes[i], 2, out=dst[:, i], dtype=np.uint16)
+        np.bitwise_or(dst, lsb_spread, out=dst)
+
+        return self.out
+
+# One unpacker per process (pool workers each import their own); the output buffer's pages
+# are only touched once a packed file actually needs unpacking.
+RAW10 = Raw10Unpacker(SENSOR_WIDTH, SENSOR_HEIGHT)
+
+def load_raw(filepath):
+    """Read the raw array from a capture (.npy is memory-mapped, legacy .npz is unzipped)."""
+    if filepath.endswith('.npy'):
+        # Plain .npy: memory-map, no decompression or up-front copy
+        return np.load(filepath, mmap_mode='r')
+    # Legacy .npz captures
+    data = np.load(filepath)
+    return data['raw']
+
+def develop(raw_packed):
+    """Unpack (if needed), demosaic and tone-map one capture. Returns the 16-bit image, or None."""
+    if raw_packed.dtype == np.uint16:
+        # Unpacked capture: already one 10-bit value per uint16, nothing to unpack
+        raw_16bit = np.asarray(raw_packed).reshape((SENSOR_HEIGHT, SENSOR_WIDTH))
+    else:
+        # Packed RAW10 (older captures): attempt unpack
+        raw_16bit = RAW10.unpack(raw_packed)
         if raw_16bit is None:
-            return
+            return None
 
-        # Simple ISP (Demosaic + Gamma)
-        bgr_image = cv2.cvtColor(raw_16bit, BAYER_PATTERN)
+    # Simple ISP (Demosaic + Gamma)
+    bgr_image = cv2.cvtColor(raw_16bit, BAYER_PATTERN)
 
-        if ENABLE_GAMMA:
-            # 10-bit max is 1023. Normalize, Gamma, Scale to 16-bit
-            norm = bgr_image.astype(np.float32) / 1023.0
-            gamma = np.power(norm, 1/2.2)
-            final_img = (np.clip(gamma, 0, 1) * 65535).astype(np.uint16)
+    if ENABLE_GAMMA:
+        # 10-bit max is 1023. Normalize, Gamma, Scale to 16-bit, via table lookup
+        if njit is not None:
+            final_img = np.empty_like(bgr_image)
+            _apply_lut(bgr_image.ravel(), GAMMA_LUT, final_img.ravel())
         else:
-            # Scale 10-bit to 16-bit explicitly
-            final_img = (bgr_image * 64).astype(np.uint16)
+            # Gather in bands of rows so the index temporaries stay cache-sized instead of
+            # a full-image intp array. mode='clip' saturates values above 1023 to 65535, as
+            # the float gamma did (and as _apply_lut does), instead of raising IndexError.
+            final_img = np.empty_like(bgr_image)
+            for y in range(0, bgr_image.shape[0], GAMMA_TILE_ROWS):
+                np.take(GAMMA_LUT, bgr_image[y:y + GAMMA_TILE_ROWS], out=final_img[y:y + GAMMA_TILE_ROWS], mode='clip')
+    else:
+        # Scale 10-bit to 16-bit explicitly (x64, in place: no extra image buffers)
+        np.left_shift(bgr_image, 6, out=bgr_image)
+        final_img = bgr_image
 
-        out_name = os.path.basename(filepath).replace('.npz', '.png')
-        out_path = os.path.join(OUTPUT_DIR, out_name)
-        cv2.imwrite(out_path, final_img)
-        print(f"   -> Saved: {out_name}")
+    return final_img
+
+def save_image(filepath, final_img):
+    """Write the developed image for the capture at filepath into OUTPUT_DIR as PNG."""
+    out_name = os.path.splitext(os.path.basename(filepath))[0] + '.png'
+    out_path = os.path.join(OUTPUT_DIR, out_name)
+    # Keep OpenCV's default PNG settings (fastest zlib level + RLE strategy). Passing
+    # IMWRITE_PNG_COMPRESSION also resets the strategy and made writes ~3x slower.
+    cv2.imwrite(out_path, final_img)
+    print(f"   -> Saved: {out_name}")
+
+def process_file(filepath):
+    print(f"Processing: {os.path.basename(filepath)}...")
+    
+    try:
+        final_img = develop(load_raw(filepath))
+        if final_img is None:
+            return
+        save_image(filepath, final_img)
 
     except Exception as e:
         print(f"   -> Failed: {e}")
 
+def process_files_pipelined(files):
+    """
+    Process files in this process with I/O overlapped: a loader thread reads file N+1 and a
+    writer thread encodes file N-1 while this thread develops file N.
+    """
+    loaded = queue.Queue(maxsize=2)
+    to_write = queue.Queue(maxsize=2)
+
+    def loader():
+        for f in files:
+            try:
+                # np.array() pulls memory-mapped data in now, so the read really happens here
+                raw = np.array(load_raw(f))
+            except Exception as e:
+                print(f"   -> Failed: {os.path.basename(f)}: {e}")
+                raw = None
+            loaded.put((f, raw))
+        loaded.put(None)
+
+    def writer():
+        while True:
+            job = to_write.get()
+            if job is None:
+                return
+            f, final_img = job
+            try:
+                save_image(f, final_img)
+            except Exception as e:
+                print(f"   -> Failed: {os.path.basename(f)}: {e}")
+
+    load_thr = threading.Thread(target=loader, daemon=True)
+    write_thr = threading.Thread(target=writer, daemon=True)
+    load_thr.start()
+    write_thr.start()
+
+    while True:
+        item = loaded.get()
+        if item is None:
+            break
+        f, raw = item
+        if raw is None:
+            continue
+        print(f"Processing: {os.path.basename(f)}...")
+        try:
+            final_img = develop(raw)
+        except Exception as e:
+            print(f"   -> Failed: {e}")
+            continue
+        if final_img is not None:
+            to_write.put((f, final_img))
+
+    to_write.put(None)
+    write_thr.join()
+    load_thr.join()
+
+def _init_worker():
+    """Pool initializer: the pool already puts a process on every core, so keep each one single-threaded."""
+    cv2.setNumThreads(1)
+    if njit is not None:
+        set_num_threads(1)
+
 def main():
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
     
-    files = sorted(glob.glob(os.path.join(INPUT_DIR, "*.npz")))
+    files = sorted(glob.glob(os.path.join(INPUT_DIR, "*.npy")) + glob.glob(os.path.join(INPUT_DIR, "*.npz")))
     if not files:
-        print("No .npz files found!")
+        print("No .npy/.npz files found!")
         return
 
-    for f in files:
-        process_file(f)
+    # Parallelise along one axis at a time, never both (that oversubscribes the cores)
+    n_cores = os.cpu_count() or 1
+    if len(files) < n_cores:
+        # Too few files to fill a process per core: run them here, overlapping load/develop/write,
+        # and let OpenCV/Numba use every core within each frame
+        cv2.setNumThreads(n_cores)
+        process_files_pipelined(files)
+    else:
+        # Files are independent: spread them over one single-threaded worker process per core
+        with ProcessPoolExecutor(max_workers=n_cores, initializer=_init_worker) as ex:
+            list(ex.map(process_file, files))
 
 if __name__ == "__main__":
     main()